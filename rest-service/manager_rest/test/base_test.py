@@ -13,30 +13,42 @@
 #  * See the License for the specific language governing permissions and
 #  * limitations under the License.
 
-import json
+import argparse
+import atexit
+import functools
+import itertools
 import logging
 import os
+import re
 import shutil
 import tempfile
 import time
 import traceback
 import unittest
-import uuid
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 from typing import List
 from unittest.mock import Mock, patch
 
+import orjson
 import psycopg2
 import requests
+import sqlalchemy.event
 import sqlalchemy.exc
 
+from alembic.config import Config as AlembicConfig
+from alembic.runtime.environment import EnvironmentContext
+from alembic.script import ScriptDirectory
 from flask.testing import FlaskClient
-from flask_migrate import Migrate, upgrade
+from flask_migrate import Migrate
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm.session import close_all_sessions
 from urllib.parse import quote as urlquote
 
 from cloudify_rest_client import CloudifyClient
 from cloudify_rest_client.exceptions import CloudifyClientError
+from cloudify_rest_client.utils import tar_blueprint
 
 from cloudify.models_states import (ExecutionState,
                                     VisibilityState,
@@ -68,6 +80,7 @@ from manager_rest import premium_enabled
 
 from .mocks import (
     MockHTTPClient,
+    MockCloudifyClient,
     CLIENT_API_VERSION,
     build_query_string,
     mock_execute_workflow,
@@ -78,6 +91,35 @@ from .mocks import (
 MIGRATION_DIR = os.path.normpath(os.path.join(
     os.path.dirname(__file__), '..', '..', 'migrations'
 ))
+API_PREFIX = f'/api/{CLIENT_API_VERSION}'
+
+
+@functools.lru_cache(maxsize=None)
+def _migration_scripts():
+    """Alembic config and scripts for MIGRATION_DIR, loaded once per process
+
+    alembic.command.upgrade (and so flask_migrate.upgrade) creates a new
+    ScriptDirectory, and parses every revision file again, on each call.
+    No configure callbacks are registered with flask_migrate, so the config
+    is the one it would build.
+    """
+    alembic_config = AlembicConfig(os.path.join(MIGRATION_DIR, 'alembic.ini'))
+    alembic_config.set_main_option('script_location', MIGRATION_DIR)
+    alembic_config.cmd_opts = argparse.Namespace(x=None)
+    return alembic_config, ScriptDirectory.from_config(alembic_config)
+
+
+def _upgrade_db(revision='head'):
+    """Same as alembic.command.upgrade, using the cached scripts"""
+    alembic_config, script = _migration_scripts()
+    with EnvironmentContext(
+        alembic_config,
+        script,
+        fn=lambda rev, context: script._upgrade_revs(revision, rev),
+        destination_rev=revision,
+    ):
+        script.run_env()
+
 
 permitted_roles = ['sys_admin', 'manager', 'user', 'operations', 'viewer']
 auth_roles = [
@@ -106,6 +148,54 @@ auth_permissions = {
     'set_timestamp': ['sys_admin'],
     'set_owner': ['sys_admin'],
 }
+encryption_key = (
+    'lF88UP5SJKluylJIkPDYrw5UMKOgv9w8TikS0Ds8m2UmM'
+    'SzFe0qMRa0EcTgHst6LjmF_tZbq_gi_VArepMsrmw=='
+)
+
+
+def session_patchers():
+    """Patchers that are started once, for the whole test session.
+
+    RabbitMQ related modules - AMQP manager and workflow executor - are
+    mocked, because we don't have RabbitMQ in the unittests, and external
+    auth isn't loaded, because we're not gonna be using ldap!
+    """
+    patchers = [
+        patch('manager_rest.amqp_manager.RabbitMQClient'),
+        patch('manager_rest.workflow_executor._broadcast_mgmtworker_task'),
+        patch('manager_rest.workflow_executor.execute_workflow',
+              mock_execute_workflow),
+        patch('manager_rest.workflow_executor.send_hook'),
+        patch('cloudify.cryptography_utils._get_encryption_key',
+              Mock(return_value=encryption_key)),
+        patch('manager_rest.rest.rest_utils.verify_role'),
+    ]
+    if premium_enabled:
+        patchers.append(patch('manager_rest.server.configure_auth',
+                              return_value=None))
+    return patchers
+
+
+# ids for the fixture objects only need to be unique in the db, which is
+# per-process (see _find_db_name)
+_fixture_ids = itertools.count()
+
+
+def _unique_str():
+    return f'{os.getpid()}-{next(_fixture_ids)}'
+
+
+# users and tenants by name, for _get_sm; the caches are cleared after
+# every test, along with the db
+@functools.lru_cache(maxsize=64)
+def _user_by_name(username):
+    return models.User.query.filter_by(username=username).one()
+
+
+@functools.lru_cache(maxsize=64)
+def _tenant_by_name(tenant_name):
+    return models.Tenant.query.filter_by(name=tenant_name).one()
 
 
 class TestClient(FlaskClient):
@@ -113,21 +203,25 @@ class TestClient(FlaskClient):
     class for the purpose of adding authorization headers to all rest calls
     """
     __test__ = False
+    _auth_header_cache = {}
 
     def __init__(self, *args, **kwargs):
         self._user = kwargs.pop('user')
         super(TestClient, self).__init__(*args, **kwargs)
 
+    def _auth_header(self):
+        credentials = (self._user['username'], self._user['password'])
+        if credentials not in self._auth_header_cache:
+            self._auth_header_cache[credentials] = utils.create_auth_header(
+                username=credentials[0],
+                password=credentials[1],
+            )
+        return self._auth_header_cache[credentials]
+
     def open(self, *args, **kwargs):
-        kwargs = kwargs or {}
         kwargs['headers'] = kwargs.get('headers') or {}
         if CLOUDIFY_EXECUTION_TOKEN_HEADER not in kwargs['headers']:
-            kwargs['headers'].update(
-                utils.create_auth_header(
-                    username=self._user['username'],
-                    password=self._user['password']
-                )
-            )
+            kwargs['headers'].update(self._auth_header())
         kwargs['headers'].setdefault(
             constants.CLOUDIFY_TENANT_HEADER,
             constants.DEFAULT_TENANT_NAME
@@ -135,6 +229,46 @@ class TestClient(FlaskClient):
         return super(TestClient, self).open(*args, **kwargs)
 
 
+def _json_dumps(data):
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+
+# characters that urllib.parse.quote would escape in a path
+_UNSAFE_URL_CHARS = re.compile(r'[^A-Za-z0-9/_.~-]')
+
+
+def _quote_url(url):
+    if _UNSAFE_URL_CHARS.search(url):
+        return urlquote(url)
+    return url
+
+
+@functools.lru_cache(maxsize=32)
+def _blueprint_archive(blueprint_path):
+    """Archive the blueprint's directory, once per process.
+
+    The test blueprints don't change during a test run, so there's no need
+    to tar them up again for every upload.
+    """
+    archive_dir = tempfile.mkdtemp(prefix='blueprint-archive-')
+    atexit.register(shutil.rmtree, archive_dir, True)
+    return tar_blueprint(blueprint_path, archive_dir)
+
+
+# the mgmtworker workflows are imported lazily, so that importing this module
+# doesn't require cloudify_system_workflows
+@functools.lru_cache(maxsize=None)
+def _create_deployment_env_workflow():
+    from cloudify_system_workflows.deployment_environment import create
+    return create
+
+
+@functools.lru_cache(maxsize=None)
+def _upload_blueprint_workflow():
+    from cloudify_system_workflows.blueprint import upload
+    return upload
+
+
 def copy_resources(file_server_root):
     resources_path = os.path.normpath(os.path.join(
         # rest-service/manager-rest/tests/
@@ -146,7 +280,8 @@ def copy_resources(file_server_root):
         'rest-service',
         'cloudify',
     ))
-    shutil.copytree(
+    # the resources are only ever read by the tests, so a symlink is enough
+    os.symlink(
         resources_path,
         os.path.join(file_server_root, 'cloudify'),
     )
@@ -158,9 +293,12 @@ class BaseServerTestCase(unittest.TestCase):
     tmpdir: str
     server_configuration: config.Config
     _patchers: List
+    _db_cleared = False
     rest_service_log: str
     maintenance_mode_dir: str
     tmp_conf_file: str
+    archive_dir: str
+    _http: requests.Session
 
     LABELS = [{'env': 'aws'}, {'arch': 'k8s'}]
     LABELS_2 = [{'env': 'gcp'}, {'arch': 'k8s'}]
@@ -206,9 +344,10 @@ class BaseServerTestCase(unittest.TestCase):
         filter_rules = [FilterRule(*params) for params in filter_rules_params]
         query = db.session.query(resource_model)
         query = add_filter_rules_to_query(query, resource_model, filter_rules)
-        results = query.all()
+        # only the ids are needed, so don't load the whole ORM objects
+        results = query.with_entities(resource_model.id)
 
-        assert resource_ids_set == set(res.id for res in results)
+        assert resource_ids_set == set(res_id for res_id, in results)
 
     @classmethod
     def create_client_with_tenant(cls,
@@ -229,70 +368,14 @@ class BaseServerTestCase(unittest.TestCase):
     def create_client(cls, headers=None, app=None):
         if app is None:
             app = cls.app
-        client = CloudifyClient(host='localhost', headers=headers)
+        mock_http_client = MockHTTPClient(
+            app, headers=headers, root_path=cls.tmpdir)
+        client = MockCloudifyClient(
+            mock_http_client, host='localhost', headers=headers)
         client.username = 'admin'
         client.tenant_name = 'default_tenant'
         if headers and CLOUDIFY_TENANT_HEADER in headers:
             client.tenant_name = headers[CLOUDIFY_TENANT_HEADER]
-
-        mock_http_client = MockHTTPClient(
-            app, headers=headers, root_path=cls.tmpdir)
-        client._client = mock_http_client
-        client.blueprints.api = mock_http_client
-        client.deployments.api = mock_http_client
-        client.deployments.outputs.api = mock_http_client
-        client.deployment_modifications.api = mock_http_client
-        client.executions.api = mock_http_client
-        client.nodes.api = mock_http_client
-        client.node_instances.api = mock_http_client
-        client.manager.api = mock_http_client
-        client.evaluate.api = mock_http_client
-        client.tokens.api = mock_http_client
-        client.events.api = mock_http_client
-        # only exists in v2 and above
-        if CLIENT_API_VERSION != 'v1':
-            client.plugins.api = mock_http_client
-            client.snapshots.api = mock_http_client
-
-            # only exists in v2.1 and above
-            if CLIENT_API_VERSION != 'v2':
-                client.maintenance_mode.api = mock_http_client
-                client.deployment_updates.api = mock_http_client
-
-                # only exists in v3 and above
-                if CLIENT_API_VERSION != 'v2.1':
-                    client.tenants.api = mock_http_client
-                    client.user_groups.api = mock_http_client
-                    client.users.api = mock_http_client
-                    client.ldap.api = mock_http_client
-                    client.secrets.api = mock_http_client
-
-                    # only exists in v3.1 and above
-                    if CLIENT_API_VERSION != 'v3':
-                        client.deployments.capabilities.api = mock_http_client
-                        client.agents.api = mock_http_client
-                        client.tasks_graphs.api = mock_http_client
-                        client.operations.api = mock_http_client
-                        client.plugins_update.api = mock_http_client
-                        client.sites.api = mock_http_client
-                        client.inter_deployment_dependencies.api = \
-                            mock_http_client
-                        client.deployments_labels.api = mock_http_client
-                        client.blueprints_filters.api = mock_http_client
-                        client.deployments_filters.api = mock_http_client
-                        client.deployment_groups.api = mock_http_client
-                        client.execution_groups.api = mock_http_client
-                        client.execution_schedules.api = mock_http_client
-                        client.blueprints_labels.api = mock_http_client
-                        client.workflows.api = mock_http_client
-                        client.permissions.api = mock_http_client
-                        client.nodes.types.api = mock_http_client
-                        client.deployments.scaling_groups.api = \
-                            mock_http_client
-                        client.secrets_providers.api = mock_http_client
-                        client.resources.api = mock_http_client
-                        client.summary.node_instances.api = mock_http_client
-
         return client
 
     @classmethod
@@ -302,13 +385,14 @@ class BaseServerTestCase(unittest.TestCase):
         cls._create_temp_files_and_folders()
         cls.server_configuration = cls.create_configuration()
 
+        # the common patchers are started once per session, in conftest.py;
+        # subclasses can start their own and add them here, to be stopped
+        # in tearDownClass
         cls._patchers = []
-        cls._mock_amqp_modules()
-        cls._mock_external_auth()
-        cls._mock_get_encryption_key()
-        cls._mock_verify_role()
-        for patcher in cls._patchers:
-            patcher.start()
+
+        # for wait_for_url, so that polling reuses the connection
+        cls._http = requests.Session()
+        cls.addClassCleanup(cls._http.close)
 
         copy_resources(cls.server_configuration.file_server_root)
         server.app = server.CloudifyFlaskApp(False)
@@ -346,13 +430,17 @@ class BaseServerTestCase(unittest.TestCase):
             user=self.user,
         )
         self.rm = get_resource_manager(self.sm)
+        # storage managers for the clients' users & tenants, see _get_sm
+        self._sm_cache = {}
+        self.addCleanup(self._sm_cache.clear)
+        self.addCleanup(_user_by_name.cache_clear)
+        self.addCleanup(_tenant_by_name.cache_clear)
         if premium_enabled:
             # License is required only when working with Cloudify Premium
             upload_mock_cloudify_license(self.sm)
 
         utils.set_current_tenant(self.tenant)
         self.initialize_provider_context()
-        self.addCleanup(self._drop_db, keep_tables=['config'])
         self.addCleanup(self._clean_tmpdir)
 
     @staticmethod
@@ -370,51 +458,12 @@ class BaseServerTestCase(unittest.TestCase):
                 continue
             server.db.session.execute(table.delete())
         server.db.session.commit()
-        db.engine.dispose()
 
     def _clean_tmpdir(self):
-        shutil.rmtree(os.path.join(self.tmpdir, 'blueprints'),
-                      ignore_errors=True)
-        shutil.rmtree(os.path.join(self.tmpdir, 'uploaded-blueprints'),
-                      ignore_errors=True)
-
-    @classmethod
-    def _mock_verify_role(cls):
-        mock_verify_role = patch('manager_rest.rest.rest_utils.verify_role')
-        cls._patchers.append(mock_verify_role)
-
-    @classmethod
-    def _mock_external_auth(cls):
-        """No need for external auth loading; we're not gonna be using ldap!"""
-        if premium_enabled:
-            auth_path = patch(
-                'manager_rest.server.configure_auth',
-                return_value=None)
-            cls._patchers.append(auth_path)
-
-    @classmethod
-    def _mock_amqp_modules(cls):
-        """
-        Mock RabbitMQ related modules - AMQP manager and workflow executor -
-        that use pika, because we don't have RabbitMQ in the unittests
-        """
-        amqp_patches = [
-            patch('manager_rest.amqp_manager.RabbitMQClient'),
-            patch('manager_rest.workflow_executor._broadcast_mgmtworker_task'),
-            patch('manager_rest.workflow_executor.execute_workflow',
-                  mock_execute_workflow),
-            patch('manager_rest.workflow_executor.send_hook'),
-        ]
-        cls._patchers.extend(amqp_patches)
-
-    @classmethod
-    def _mock_get_encryption_key(cls):
-        """ Mock the _get_encryption_key_patcher function for all unittests """
-        get_encryption_key_patcher = patch(
-            'cloudify.cryptography_utils._get_encryption_key',
-            Mock(return_value=config.instance.security_encryption_key)
-        )
-        cls._patchers.append(get_encryption_key_patcher)
+        self.quiet_delete_directories([
+            os.path.join(self.tmpdir, 'blueprints'),
+            os.path.join(self.tmpdir, 'uploaded-blueprints'),
+        ])
 
     @classmethod
     def _create_temp_files_and_folders(cls):
@@ -424,6 +473,7 @@ class BaseServerTestCase(unittest.TestCase):
         cls.maintenance_mode_dir = tempfile.mkdtemp(prefix='maintenance-')
         fd, cls.tmp_conf_file = tempfile.mkstemp(prefix='conf-file-')
         os.close(fd)
+        cls.archive_dir = tempfile.mkdtemp(prefix='archives-', dir=cls.tmpdir)
 
     @classmethod
     def _handle_flask_app_and_db(cls):
@@ -434,22 +484,28 @@ class BaseServerTestCase(unittest.TestCase):
     @staticmethod
     def _insert_default_permissions():
         sess = server.db.session
-        for role in auth_roles:
-            sess.add(models.Role(type='system_role', **role))
-        roles = {r.name: r.id for r in sess.query(models.Role)}
-        for perm, perm_roles in auth_permissions.items():
-            for role_name in perm_roles:
-                if role_name not in roles:
-                    continue
-                sess.add(models.Permission(
-                    role_id=roles[role_name],
-                    name=perm))
+        roles_table = models.Role.__table__
+        inserted_roles = sess.execute(
+            roles_table.insert()
+            .values([dict(role, type='system_role') for role in auth_roles])
+            .returning(roles_table.c.name, roles_table.c.id)
+        )
+        roles = dict(inserted_roles.all())
+        sess.execute(
+            models.Permission.__table__.insert(),
+            [
+                {'role_id': roles[role_name], 'name': perm}
+                for perm, perm_roles in auth_permissions.items()
+                for role_name in perm_roles
+                if role_name in roles
+            ],
+        )
         sess.commit()
 
     def _handle_default_db_config(self):
         Migrate(app=server.app, db=server.db)
         try:
-            upgrade(directory=MIGRATION_DIR)
+            _upgrade_db()
         except sqlalchemy.exc.OperationalError:
             logger = logging.getLogger()
             logger.error(
@@ -477,8 +533,55 @@ class BaseServerTestCase(unittest.TestCase):
                 f"-e POSTGRES_DB={config.instance.postgresql_db_name} "
                 "-p 5432:5432 -d postgres")
             raise
+        if not BaseServerTestCase._db_cleared:
+            # tests don't commit anything, but a previous, interrupted, run
+            # might have
+            self._drop_db(keep_tables=['config'])
+            BaseServerTestCase._db_cleared = True
+        self._begin_test_transaction()
         self._insert_default_permissions()
 
+    def _begin_test_transaction(self):
+        """Run the test in a transaction that is rolled back when it ends.
+
+        The session is bound to a connection with an open transaction, and
+        works in a SAVEPOINT that is restarted whenever the code under test
+        commits or rolls back, so nothing the test does is ever really
+        committed. Rolling back is much faster than deleting the contents
+        of every table after each test.
+
+        Only writes made through db.session are isolated this way. Anything
+        written through db.engine directly, through another connection, or
+        from another thread, is really committed, and stays in the db for
+        the later tests in this process.
+        """
+        connection = db.engine.connect()
+        transaction = connection.begin()
+        savepoint = connection.begin_nested()
+        app_session = db.session
+        db.session = db.create_scoped_session(
+            options={'bind': connection, 'binds': {}})
+
+        @sqlalchemy.event.listens_for(db.session, 'after_transaction_end')
+        def restart_savepoint(session, session_transaction):
+            nonlocal savepoint
+            if not savepoint.is_active:
+                savepoint = connection.begin_nested()
+
+        def rollback():
+            db.session.remove()
+            db.session = app_session
+            # if the outer transaction was ended by the test (eg. by
+            # committing on the connection itself), its writes are in the db
+            # already, so clear them the slow way
+            escaped = not transaction.is_active
+            if not escaped:
+                transaction.rollback()
+            connection.close()
+            if escaped:
+                self._drop_db(keep_tables=['config'])
+        self.addCleanup(rollback)
+
     @staticmethod
     def _get_app(flask_app, user=None):
         """Create a flask.testing FlaskClient
@@ -494,10 +597,14 @@ class BaseServerTestCase(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
+        # every test class gets a new app, and with it, a new engine; the
+        # pooled connections are kept between tests, but not between classes
+        with server.app.app_context():
+            db.engine.dispose()
         cls.quiet_delete(cls.rest_service_log)
         cls.quiet_delete(cls.tmp_conf_file)
-        cls.quiet_delete_directory(cls.maintenance_mode_dir)
-        cls.quiet_delete_directory(cls.tmpdir)
+        # archive_dir is inside tmpdir
+        cls.quiet_delete_directories([cls.maintenance_mode_dir, cls.tmpdir])
 
         for patcher in cls._patchers:
             patcher.stop()
@@ -593,10 +700,7 @@ class BaseServerTestCase(unittest.TestCase):
         test_config.security_encoding_min_length = 5
         test_config.authorization_permissions = auth_permissions
         test_config.authorization_roles = []
-        test_config.security_encryption_key = (
-            'lF88UP5SJKluylJIkPDYrw5UMKOgv9w8TikS0Ds8m2UmM'
-            'SzFe0qMRa0EcTgHst6LjmF_tZbq_gi_VArepMsrmw=='
-        )
+        test_config.security_encryption_key = encryption_key
 
         test_config.amqp_host = 'localhost'
         test_config.amqp_username = 'guest'
@@ -609,16 +713,13 @@ class BaseServerTestCase(unittest.TestCase):
     def _version_url(url):
         # method for versionifying URLs for requests which don't go through
         # the REST client; the version is taken from the REST client regardless
-        if not url.startswith('/api/'):
-            url = '/api/{0}{1}'.format(CLIENT_API_VERSION, url)
-
-        return url
+        return url if url.startswith('/api/') else API_PREFIX + url
 
     def post(self, resource_path, data, query_params=None):
         url = self._version_url(resource_path)
-        result = self.app.post(urlquote(url),
+        result = self.app.post(_quote_url(url),
                                content_type='application/json',
-                               data=json.dumps(data),
+                               data=_json_dumps(data),
                                query_string=build_query_string(query_params))
         return result
 
@@ -626,8 +727,9 @@ class BaseServerTestCase(unittest.TestCase):
     def post_file(cls, resource_path, file_path, query_params=None):
         url = cls._version_url(resource_path)
         with open(file_path, 'rb') as f:
-            result = cls.app.post(urlquote(url),
-                                  data=f.read(),
+            result = cls.app.post(_quote_url(url),
+                                  input_stream=f,
+                                  content_length=os.fstat(f.fileno()).st_size,
                                   query_string=build_query_string(
                                       query_params))
             return result
@@ -635,42 +737,43 @@ class BaseServerTestCase(unittest.TestCase):
     def put_file(self, resource_path, file_path, query_params=None):
         url = self._version_url(resource_path)
         with open(file_path, 'rb') as f:
-            result = self.app.put(urlquote(url),
-                                  data=f.read(),
+            result = self.app.put(_quote_url(url),
+                                  input_stream=f,
+                                  content_length=os.fstat(f.fileno()).st_size,
                                   query_string=build_query_string(
                                       query_params))
             return result
 
     def put(self, resource_path, data=None, query_params=None):
         url = self._version_url(resource_path)
-        result = self.app.put(urlquote(url),
+        result = self.app.put(_quote_url(url),
                               content_type='application/json',
-                              data=json.dumps(data) if data else None,
+                              data=_json_dumps(data) if data else None,
                               query_string=build_query_string(query_params))
         return result
 
     def patch(self, resource_path, data):
         url = self._version_url(resource_path)
-        result = self.app.patch(urlquote(url),
+        result = self.app.patch(_quote_url(url),
                                 content_type='application/json',
-                                data=json.dumps(data))
+                                data=_json_dumps(data))
         return result
 
     def get(self, resource_path, query_params=None, headers=None):
         url = self._version_url(resource_path)
-        result = self.app.get(urlquote(url),
+        result = self.app.get(_quote_url(url),
                               headers=headers,
                               query_string=build_query_string(query_params))
         return result
 
     def head(self, resource_path):
         url = self._version_url(resource_path)
-        result = self.app.head(urlquote(url))
+        result = self.app.head(_quote_url(url))
         return result
 
     def delete(self, resource_path, query_params=None):
         url = self._version_url(resource_path)
-        result = self.app.delete(urlquote(url),
+        result = self.app.delete(_quote_url(url),
                                  query_string=build_query_string(query_params))
         return result
 
@@ -697,7 +800,9 @@ class BaseServerTestCase(unittest.TestCase):
 
     def archive_mock_blueprint(self, archive_func=archiving.make_targzfile,
                                blueprint_dir='mock_blueprint'):
-        archive_path = tempfile.mkstemp()[1]
+        fd, archive_path = tempfile.mkstemp(dir=self.archive_dir)
+        os.close(fd)
+        self.addCleanup(self.quiet_delete, archive_path)
         source_dir = os.path.join(os.path.dirname(
             os.path.abspath(__file__)), blueprint_dir)
         archive_func(archive_path, source_dir)
@@ -764,26 +869,32 @@ class BaseServerTestCase(unittest.TestCase):
                                                deployment_id,
                                                **create_deployment_kwargs)
         self.create_deployment_environment(deployment, client=client)
+        # the create response predates the workflow setting the deployment's
+        # attributes (workflows, outputs, ...), which callers do look at, so
+        # it must be fetched again; the full object, because that's what
+        # callers expect to get
         deployment = client.deployments.get(deployment_id)
         return blueprint_id, deployment.id, blueprint_response, deployment
 
     def create_deployment_environment(self, deployment, client=None):
-        from cloudify_system_workflows.deployment_environment import create
+        create = _create_deployment_env_workflow()
         client = client or self.client
         sm = self._get_sm(client)
-        m = Mock()
         deployment = sm.get(models.Deployment, deployment.id)
-        blueprint = client.blueprints.get(deployment.blueprint_id)
-        m.deployment = client.deployments.get(deployment.id)
-        m.blueprint = blueprint
-        m.tenant_name = deployment.tenant_name
+        # the workflow only reads ids (and runtime_only_evaluation) from
+        # these, so the storage objects will do; no need to GET them
+        m = SimpleNamespace(
+            deployment=deployment,
+            blueprint=deployment.blueprint,
+            tenant_name=deployment.tenant_name,
+            logger=logging.getLogger('create_deployment_environment'),
+            get_deployment=lambda dep_id: sm.get(models.Deployment, dep_id),
+        )
         deployment.create_execution.status = ExecutionState.STARTED
         sm.update(deployment.create_execution)
         get_rest_client_target = \
             'cloudify_system_workflows.deployment_environment.get_rest_client'
-        with patch(get_rest_client_target, return_value=client), \
-                patch('cloudify_system_workflows.deployment_environment.'
-                      'os.makedirs'):
+        with patch(get_rest_client_target, return_value=client):
             try:
                 create(m, **deployment.create_execution.parameters)
             except Exception:
@@ -816,24 +927,31 @@ class BaseServerTestCase(unittest.TestCase):
 
         blueprint_path = self.get_blueprint_path(
             os.path.join(blueprint_dir, blueprint_file_name))
-        client.blueprints.upload(path=blueprint_path,
-                                 entity_id=blueprint_id,
-                                 async_upload=True,
-                                 labels=labels,
-                                 visibility=visibility)
+        # like client.blueprints.upload, but with the archive only made once
+        client.blueprints.publish_archive(
+            _blueprint_archive(blueprint_path),
+            blueprint_id,
+            blueprint_filename=os.path.basename(blueprint_path),
+            async_upload=True,
+            labels=labels,
+            visibility=visibility,
+        )
         self.execute_upload_blueprint_workflow(blueprint_id, client)
         blueprint = client.blueprints.get(blueprint_id)
         return blueprint
 
     def wait_for_url(self, url, timeout=5):
         end = time.time() + timeout
+        delay = 0.05
 
         while end >= time.time():
             try:
-                if requests.get(url).status_code == 200:
+                if self._http.get(url, timeout=1).status_code == 200:
                     return
             except requests.exceptions.RequestException:
-                time.sleep(1)
+                pass
+            time.sleep(delay)
+            delay = min(delay * 1.5, 0.5)
 
         raise RuntimeError('Url {0} is not available (waited {1} '
                            'seconds)'.format(url, timeout))
@@ -849,22 +967,34 @@ class BaseServerTestCase(unittest.TestCase):
     def quiet_delete_directory(file_path):
         shutil.rmtree(file_path, ignore_errors=True)
 
+    @staticmethod
+    def quiet_delete_directories(paths):
+        """Delete all the directories, concurrently.
+
+        The directories must not be nested in one another.
+        """
+        if not paths:
+            return
+        with ThreadPoolExecutor(max_workers=min(8, len(paths))) as executor:
+            list(executor.map(
+                functools.partial(shutil.rmtree, ignore_errors=True), paths))
+
     def wait_for_deployment_creation(self, client, deployment_id):
-        env_creation_execution = None
-        deployment_executions = client.executions.list(
-            deployment_id=deployment_id
+        env_creation_executions = client.executions.list(
+            deployment_id=deployment_id,
+            workflow_id='create_deployment_environment',
+            _include=['id', 'status', 'workflow_id'],
+            _size=1,
         )
-        for execution in deployment_executions:
-            if execution.workflow_id == 'create_deployment_environment':
-                env_creation_execution = execution
-                break
-        if env_creation_execution:
-            self.wait_for_execution(client, env_creation_execution)
+        if env_creation_executions:
+            self.wait_for_execution(client, env_creation_executions[0])
 
     @staticmethod
     def wait_for_execution(client, execution, timeout=900):
-        # Poll for execution status until execution ends
+        # Poll for execution status until execution ends, often at first,
+        # backing off from 50ms up to 1s
         deadline = time.time() + timeout
+        delay = 0.05
         while True:
             if time.time() > deadline:
                 raise Exception(
@@ -874,62 +1004,89 @@ class BaseServerTestCase(unittest.TestCase):
             execution = client.executions.get(execution.id)
             if execution.status in ExecutionState.END_STATES:
                 break
-            time.sleep(3)
+            time.sleep(min(delay, max(deadline - time.time(), 0)))
+            delay = min(delay * 1.5, 1)
 
     def _get_sm(self, client):
         """Get a StorageManager with the same user&tenant as the client"""
         if not client:
             return self.sm
-        username = client.username
-        tenant_name = client.tenant_name
-        user = models.User.query.filter_by(username=username).one()
-        tenant = models.Tenant.query.filter_by(name=tenant_name).one()
-        return SQLStorageManager(user, tenant)
+        key = (client.username, client.tenant_name)
+        if key not in self._sm_cache:
+            username, tenant_name = key
+            self._sm_cache[key] = SQLStorageManager(
+                _user_by_name(username), _tenant_by_name(tenant_name))
+        return self._sm_cache[key]
+
+    @staticmethod
+    def _find_upload_execution(sm, blueprint_id):
+        """The most recent upload_blueprint execution of the blueprint"""
+        def _filter_blueprint_id(column):
+            # this will use postgres' json operators
+            return db.cast(column, JSON)['blueprint_id'].astext == blueprint_id
+
+        executions = sm.list(
+            models.Execution,
+            filters={
+                'workflow_id': 'upload_blueprint',
+                'parameters': _filter_blueprint_id,
+            },
+            sort={'created_at': 'desc'},
+            pagination={'size': 1},
+        )
+        if not executions:
+            raise Exception(f'No `upload_blueprint` execution was found for '
+                            f'the blueprint {blueprint_id}')
+        return executions[0]
+
+    @staticmethod
+    def _set_blueprint_upload_failed(sm, blueprint_id, error):
+        blueprint = sm.get(models.Blueprint, blueprint_id)
+        blueprint.state = BlueprintUploadState.FAILED_UPLOADING
+        blueprint.error = str(error)
+        blueprint.error_traceback = traceback.format_exc()
+        sm.update(blueprint)
 
     def execute_upload_blueprint_workflow(self, blueprint_id, client=None):
-        from cloudify_system_workflows.blueprint import upload
+        upload = _upload_blueprint_workflow()
         client = client or self.client
         sm = self._get_sm(client)
-        blueprint = sm.get(models.Blueprint, blueprint_id)
-        executions = sm.list(models.Execution,
-                             filters={'workflow_id': 'upload_blueprint'})
-        for exec in executions:
-            uploaded_blueprint_id = exec.parameters.get('blueprint_id')
-            if uploaded_blueprint_id and uploaded_blueprint_id == blueprint_id:
-                uploaded_blueprint_execution = exec
-                break
-        else:
-            raise Exception(f'No `upload_blueprint` execution was found for '
-                            f'the blueprint {blueprint_id}')
+        uploaded_blueprint_execution = \
+            self._find_upload_execution(sm, blueprint_id)
 
-        m = Mock()
+        m = SimpleNamespace(logger=logging.getLogger('upload_blueprint'))
         with patch('cloudify_system_workflows.blueprint.get_rest_client',
                    return_value=client):
             try:
                 upload(m, **uploaded_blueprint_execution.parameters)
             except Exception as e:
-                blueprint.state = BlueprintUploadState.FAILED_UPLOADING
-                blueprint.error = str(e)
-                blueprint.error_traceback = traceback.format_exc()
-                sm.update(blueprint)
+                self._set_blueprint_upload_failed(sm, blueprint_id, e)
                 raise
 
-    def _add_blueprint(self, blueprint_id=None):
+    def _bulk_add(self, *instances):
+        """Put all the instances in the db, in a single transaction"""
+        with self.sm.transaction():
+            for instance in instances:
+                self.sm.put(instance)
+        return instances
+
+    @staticmethod
+    def _blueprint_model(blueprint_id=None):
         if not blueprint_id:
-            unique_str = str(uuid.uuid4())
+            unique_str = _unique_str()
             blueprint_id = 'blueprint-{0}'.format(unique_str)
         now = utils.get_formatted_timestamp()
-        blueprint = models.Blueprint(id=blueprint_id,
-                                     created_at=now,
-                                     updated_at=now,
-                                     description=None,
-                                     plan={'name': 'my-bp'},
-                                     main_file_name='aaa')
-        return self.sm.put(blueprint)
+        return models.Blueprint(id=blueprint_id,
+                                created_at=now,
+                                updated_at=now,
+                                description=None,
+                                plan={'name': 'my-bp'},
+                                main_file_name='aaa')
 
-    def _add_deployment(self, blueprint, deployment_id=None):
+    @staticmethod
+    def _deployment_model(blueprint, deployment_id=None):
         if not deployment_id:
-            unique_str = str(uuid.uuid4())
+            unique_str = _unique_str()
             deployment_id = 'deployment-{0}'.format(unique_str)
         now = utils.get_formatted_timestamp()
         deployment = models.Deployment(id=deployment_id,
@@ -946,16 +1103,12 @@ class BaseServerTestCase(unittest.TestCase):
                                        scaling_groups={},
                                        outputs={})
         deployment.blueprint = blueprint
-        return self.sm.put(deployment)
+        return deployment
 
-    def _add_execution_with_id(self, execution_id):
-        blueprint = self._add_blueprint()
-        deployment = self._add_deployment(blueprint.id)
-        return self._add_execution(deployment.id, execution_id)
-
-    def _add_execution(self, deployment, execution_id=None, workflow_id=''):
+    @staticmethod
+    def _execution_model(deployment, execution_id=None, workflow_id=''):
         if not execution_id:
-            unique_str = str(uuid.uuid4())
+            unique_str = _unique_str()
             execution_id = 'execution-{0}'.format(unique_str)
         execution = models.Execution(
             id=execution_id,
@@ -968,12 +1121,29 @@ class BaseServerTestCase(unittest.TestCase):
             blueprint_id=deployment.blueprint_id
         )
         execution.deployment = deployment
-        return self.sm.put(execution)
+        return execution
+
+    def _add_blueprint(self, blueprint_id=None):
+        return self.sm.put(self._blueprint_model(blueprint_id))
+
+    def _add_deployment(self, blueprint, deployment_id=None):
+        return self.sm.put(self._deployment_model(blueprint, deployment_id))
+
+    def _add_execution_with_id(self, execution_id):
+        blueprint = self._blueprint_model()
+        deployment = self._deployment_model(blueprint)
+        execution = self._execution_model(deployment, execution_id)
+        self._bulk_add(blueprint, deployment, execution)
+        return execution
+
+    def _add_execution(self, deployment, execution_id=None, workflow_id=''):
+        return self.sm.put(
+            self._execution_model(deployment, execution_id, workflow_id))
 
     def _add_deployment_update(self, deployment, execution,
                                deployment_update_id=None):
         if not deployment_update_id:
-            unique_str = str(uuid.uuid4())
+            unique_str = _unique_str()
             deployment_update_id = 'deployment_update-{0}'.format(unique_str)
         now = utils.get_formatted_timestamp()
         deployment_update = models.DeploymentUpdate(
@@ -1017,6 +1187,12 @@ class BaseServerTestCase(unittest.TestCase):
 
     def get_new_user_with_role(self, username, password, role,
                                tenant=DEFAULT_TENANT_NAME):
+        """Create a user with the given role in the tenant, and a client
+        for that user.
+
+        There's no need to namespace the users or tenants per pytest-xdist
+        worker: every worker already runs on its own db (see _find_db_name).
+        """
         self.client.users.create(username, password, role='default')
         self.client.tenants.add_user(username, tenant, role=role)
         return self.create_client_with_tenant(username, password)
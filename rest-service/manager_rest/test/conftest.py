@@ -0,0 +1,21 @@
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import pytest
+
+from manager_rest.test.base_test import session_patchers
+
+
+@pytest.fixture(scope='session', autouse=True)
+def base_test_patchers():
+    with ExitStack() as stack:
+        for patcher in session_patchers():
+            stack.enter_context(patcher)
+        # the tests run the create_deployment_environment workflow
+        # in-process, so it doesn't get to create the mgmtworker's
+        # deployment workdir. This isn't in session_patchers, so that
+        # importing base_test doesn't require cloudify_system_workflows
+        stack.enter_context(patch(
+            'cloudify_system_workflows.deployment_environment.'
+            '_create_deployment_workdir'))
+        yield
@@ -1,12 +1,13 @@
 import numbers
 import types
 from datetime import datetime
-from functools import wraps
+from functools import reduce, wraps
 from urllib.parse import urlencode
 
 from flask import g
 from werkzeug.datastructures import FileStorage
 
+from cloudify_rest_client import CloudifyClient
 from cloudify_rest_client.client import HTTPClient
 from cloudify_rest_client.executions import Execution
 
@@ -20,12 +21,85 @@ try:
 except ImportError:
     CLIENT_API_VERSION = 'v1'
 
+# endpoint clients that need to be pointed at the MockHTTPClient, by the
+# first rest-client API version that has them
+_API_ATTR_MAP = (
+    ('v1', (
+        'blueprints',
+        'deployments',
+        'deployments.outputs',
+        'deployment_modifications',
+        'executions',
+        'nodes',
+        'node_instances',
+        'manager',
+        'evaluate',
+        'tokens',
+        'events',
+    )),
+    ('v2', (
+        'plugins',
+        'snapshots',
+    )),
+    ('v2.1', (
+        'maintenance_mode',
+        'deployment_updates',
+    )),
+    ('v3', (
+        'tenants',
+        'user_groups',
+        'users',
+        'ldap',
+        'secrets',
+    )),
+    ('v3.1', (
+        'deployments.capabilities',
+        'agents',
+        'tasks_graphs',
+        'operations',
+        'plugins_update',
+        'sites',
+        'inter_deployment_dependencies',
+        'deployments_labels',
+        'blueprints_filters',
+        'deployments_filters',
+        'deployment_groups',
+        'execution_groups',
+        'execution_schedules',
+        'blueprints_labels',
+        'workflows',
+        'permissions',
+        'nodes.types',
+        'deployments.scaling_groups',
+        'secrets_providers',
+        'resources',
+        'summary.node_instances',
+    )),
+)
+
+
+def _active_api_attrs():
+    """Endpoint attribute paths for CLIENT_API_VERSION, by endpoint name
+
+    eg. {'deployments': [(), ('outputs',), ...], ...}
+    """
+    active_attrs = {}
+    for version, attrs in _API_ATTR_MAP:
+        for path in attrs:
+            name, *sub_path = path.split('.')
+            active_attrs.setdefault(name, []).append(tuple(sub_path))
+        if version == CLIENT_API_VERSION:
+            break
+    return active_attrs
+
+
+_ACTIVE_API_ATTRS = _active_api_attrs()
+
 
 def build_query_string(query_params):
-    query_string = ''
-    if query_params and len(query_params) > 0:
-        query_string += urlencode(query_params, True) + '&'
-    return query_string
+    if not query_params:
+        return ''
+    return urlencode(query_params, True) + '&'
 
 
 def mock_authorize(action):
@@ -165,6 +239,32 @@ class MockHTTPClient(HTTPClient):
         return response.get_json()
 
 
+class MockCloudifyClient(CloudifyClient):
+    """A CloudifyClient that sends all its requests through a MockHTTPClient
+
+    The endpoint clients (client.blueprints, client.deployments, etc.) are
+    only pointed at the mock http client when they're first accessed,
+    because most tests only use a handful of them.
+    """
+    def __init__(self, mock_http_client, **kwargs):
+        super(MockCloudifyClient, self).__init__(**kwargs)
+        self._client = mock_http_client
+        self._lazy_endpoints = {
+            name: (self.__dict__.pop(name), sub_paths)
+            for name, sub_paths in _ACTIVE_API_ATTRS.items()
+        }
+
+    def __getattr__(self, name):
+        lazy_endpoints = self.__dict__.get('_lazy_endpoints', {})
+        if name not in lazy_endpoints:
+            raise AttributeError(name)
+        endpoint, sub_paths = lazy_endpoints.pop(name)
+        for sub_path in sub_paths:
+            reduce(getattr, sub_path, endpoint).api = self._client
+        setattr(self, name, endpoint)
+        return endpoint
+
+
 class MockStreamedResponse(object):
 
     def __init__(self, response, root_path):
@@ -167,6 +167,11 @@ def tests_env(request, resource_mapping) -> utils.TestEnvironment:
     if container_id and k8s_ns:
         raise Exception('Expecting either `--container-id` or '
                         '`--k8s_namespace`, not both.')
+    if (container_id or k8s_ns) and os.environ.get('PYTEST_XDIST_WORKER'):
+        # every test resets the manager's storage once it's done, so
+        # workers can't share a manager
+        raise Exception('`--container-id` and `--k8s-namespace` cannot be '
+                        'used with pytest-xdist')
 
     if container_id:
         keep_container = True
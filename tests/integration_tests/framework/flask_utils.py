@@ -13,7 +13,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
 import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 from cloudify.utils import setup_logger
 
@@ -27,11 +30,45 @@ SCRIPT_PATH = '/tmp/reset_storage.py'
 CONFIG_PATH = '/tmp/reset_storage_config.json'
 
 
+def _script_hashes(scripts):
+    hashes = {}
+    for source, target in scripts.items():
+        with open(source, 'rb') as f:
+            hashes[target] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+def _manager_script_hashes(environment, paths):
+    """sha256 of the scripts on the manager, or None if any is missing"""
+    try:
+        output = environment.execute_on_manager(['sha256sum'] + list(paths))
+    except subprocess.CalledProcessError:
+        return None
+    hashes = {}
+    for line in output.splitlines():
+        digest, _, path = line.partition('  ')
+        hashes[path] = digest
+    return hashes
+
+
 def prepare_reset_storage_script(environment):
-    reset_script = get_resource('scripts/reset_storage.py')
-    prepare = get_resource('scripts/prepare_reset_storage.py')
-    environment.copy_file_to_manager(reset_script, SCRIPT_PATH)
-    environment.copy_file_to_manager(prepare, PREPARE_SCRIPT)
+    scripts = {
+        get_resource('scripts/reset_storage.py'): SCRIPT_PATH,
+        get_resource('scripts/prepare_reset_storage.py'): PREPARE_SCRIPT,
+    }
+    hashes = _script_hashes(scripts)
+    # when reusing a manager (--container-id/--k8s-namespace), the scripts
+    # are most likely already there from a previous run
+    if _manager_script_hashes(environment, hashes) != hashes:
+        # both copies are a separate docker cp/kubectl cp, so do them at once
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            copies = [
+                executor.submit(
+                    environment.copy_file_to_manager, source, target)
+                for source, target in scripts.items()
+            ]
+            for copy in copies:
+                copy.result()
     environment.execute_python_on_manager(
         [PREPARE_SCRIPT, '--config', CONFIG_PATH],
     )
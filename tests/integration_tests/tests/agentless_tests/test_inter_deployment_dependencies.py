@@ -13,6 +13,8 @@
 #  * See the License for the specific language governing permissions and
 #  * limitations under the License.
 
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
 from cloudify.models_states import VisibilityState
@@ -25,10 +27,16 @@ from integration_tests.tests.utils import get_resource
 
 pytestmark = pytest.mark.group_deployments
 
+# the shared resource and component deployment ids, and the secret names,
+# are also used in the blueprints (see resources/dsl/idd), so they can't
+# be made unique per test; tests don't run concurrently on one manager anyway
 MAIN_DEPLOYMENT = 'main_deployment'
 MAIN_BLUEPRINT_ID = 'main_blueprint'
 MOD_BLUEPRINT_ID = 'mod_blueprint'
 COMPUTE_NODE = 'compute_node'
+IDD_FIELDS = ['id', 'dependency_creator', 'source_deployment_id',
+              'target_deployment_id', 'target_deployment_func']
+NODE_INSTANCE_FIELDS = ['id', 'node_id', 'runtime_properties']
 SR_DEPLOYMENT = 'shared_resource_deployment'
 
 # Dependencies creation test constants
@@ -42,97 +50,8 @@ COMP_DEPLOYMENT2 = 'single_component_deployment2'
 BLUEPRINT_BASE = 'dsl/idd/inter_deployment_dependency_dep_base.yaml'
 BLUEPRINT_MOD = 'dsl/idd/inter_deployment_dependency_dep_modified.yaml'
 
-
-@pytest.mark.usefixtures('cloudmock_plugin')
-class TestInterDeploymentDependenciesInfrastructure(AgentlessTestCase):
-
-    def test_dependencies_are_created(self):
-        self._assert_dependencies_count(0)
-        self._prepare_creation_test_resources()
-        dependencies = self._assert_dependencies_count(2)
-        self._assert_initial_compute_node_dependencies(dependencies)
-
-        self._install_main_deployment()
-        node_instances = self.client.node_instances.list()
-        shared_resource = self._get_shared_resource_instance(node_instances)
-        components = [i for i in node_instances if 'component' in i.node_id]
-        # 6 = 3 components + 1 shared resource + 2 get_capability functions
-        dependencies = self._assert_dependencies_count(6)
-        dependencies = self._get_dependencies_dict(dependencies)
-
-        for component in components:
-            target_deployment = \
-                component.runtime_properties['deployment']['id']
-            self._assert_dependency_exists(
-                dependency_creator=self._get_component_dependency_creator(
-                    component.id),
-                target_deployment=target_deployment,
-                dependencies=dependencies)
-        self._assert_dependency_exists(
-            dependency_creator=self._get_shared_resource_dependency_creator(
-                shared_resource.id),
-            target_deployment=SR_DEPLOYMENT,
-            dependencies=dependencies)
-
-        self._uninstall_main_deployment()
-        dependencies = self._assert_dependencies_count(2)
-        for dependency in dependencies:
-            self.assertNotIn(COMPONENT, dependency.dependency_creator)
-            self.assertNotIn(SHARED_RESOURCE, dependency.dependency_creator)
-
-        self.delete_deployment(MAIN_DEPLOYMENT,
-                               validate=True,
-                               client=self.client)
-        self._assert_dependencies_count(0)
-
-    def test_dependencies_are_updated(self):
-        self._test_dependencies_are_updated(skip_uninstall=False)
-
-    def test_dependencies_are_updated_but_keeps_old_dependencies(self):
-        self._test_dependencies_are_updated(skip_uninstall=True)
-
-    def test_cyclic_dependency_after_execution(self):
-        """Creating a cyclic dependency in a workflow, fails that execution.
-
-        We'll prepare two deployments that will eventually depend on each
-        other; having dep1 depend on dep2 is OK, but then making dep2
-        depend on dep1, is going to fail the execution that attempted
-        to set this dependency.
-        """
-        self.upload_blueprint_resource(
-            'dsl/idd/dependency_from_property.yaml', 'bp1'
-        )
-        self.client.deployments.create(
-            'bp1', 'dep1', inputs={'target_id': 'dep2'})
-        self.client.deployments.create(
-            'bp1', 'dep2', inputs={'target_id': 'dep1'})
-        self.wait_for_deployment_environment('dep1')
-        self.wait_for_deployment_environment('dep2')
-        exc = self.client.executions.start(
-            'dep1', 'execute_operation', parameters={
-                'operation': 'custom.set_attribute',
-            }
-        )
-        self.wait_for_execution_to_end(exc)
-
-        outs = self.client.deployments.outputs.get('dep1')
-        assert outs.outputs == {'out1': 1}
-
-        exc = self.client.executions.start(
-            'dep2', 'execute_operation', parameters={
-                'operation': 'custom.set_attribute',
-            }
-        )
-        with self.assertRaises(RuntimeError):
-            self.wait_for_execution_to_end(exc)
-
-    def test_dependency_func_with_context(self):
-        """Check that IDD-creating-functions can use context
-
-        Specifically, get_capability must be able to fetch things from
-        SELF and TARGET.
-        """
-        bp1_yaml = """
+# Inline blueprints of the IDD-creating-functions context tests
+CONTEXT_TARGET_BLUEPRINT = """
 tosca_definitions_version: cloudify_dsl_1_4
 imports:
     - cloudify/types/types.yaml
@@ -140,7 +59,7 @@ capabilities:
     cap1:
         value: capability value
 """
-        bp2_yaml = """
+CONTEXT_SOURCE_BLUEPRINT = """
 tosca_definitions_version: cloudify_dsl_1_4
 imports:
     - cloudify/types/types.yaml
@@ -187,63 +106,7 @@ node_templates:
                                     - {get_attribute: [SOURCE, prop1]}
                                     - {get_attribute: [TARGET, prop1]}
 """
-        self.upload_blueprint_resource(
-            self.make_yaml_file(bp1_yaml),
-            blueprint_id='bp1',
-        )
-        self.upload_blueprint_resource(
-            self.make_yaml_file(bp2_yaml),
-            blueprint_id='bp2',
-        )
-        dep1 = self.deploy(blueprint_id='bp1', deployment_id='d1')
-        dep2 = self.deploy(blueprint_id='bp2', deployment_id='d2')
-        exc = self.client.executions.create(dep2.id, 'install')
-        self.wait_for_execution_to_end(exc)
-
-        idds = self.client.inter_deployment_dependencies.list(
-            source_deployment_id=dep2.id)
-        for idd in idds:
-            # we have declared IDDs using several ways, but they all point
-            # to dep1 in the end
-            assert idd.target_deployment_id == dep1.id
-            # ...they all come from a function...
-            assert idd.target_deployment_func.get('function')
-            # ...and they all declare some context
-            assert idd.target_deployment_func.get('context')
-
-        nodes = self.client.nodes.list(
-            deployment_id=dep2.id,
-            id='n1',
-            evaluate_functions=True,
-        )
-        assert len(nodes) == 1
-        assert nodes[0].properties['x'] == 'capability value'
-        nis = self.client.node_instances.list(
-            deployment_id=dep2.id,
-            node_id='n1',
-        )
-        assert len(nis) == 1
-        assert nis[0].runtime_properties['lifecycle_operation'] == \
-            'capability value'
-        assert nis[0].runtime_properties['rel_operation'] == \
-            'capability value'
-
-    def test_idd_with_context_multiple_instances(self):
-        """Check that IDDs can come from functions in scaled instances.
-
-        A somewhat complex blueprint!
-        First, the node `rel_target` (two instances of it) each fetch a
-        different entry from the input list, and store it in their runtime
-        properties.
-        Then, two instances of node `n1` run a lifecycle operation, and a
-        relationship operation, fetching a capability from a deployment given
-        by their related `rel_target` instance, with the capability name
-        based on their own property.
-        Finally, we check that since we've had two instances of the scaling
-        group, we've seen capability values coming from BOTH related
-        deployments.
-        """
-        bp1_yaml = """
+SCALED_TARGET_BLUEPRINT = """
 tosca_definitions_version: cloudify_dsl_1_4
 imports:
     - cloudify/types/types.yaml
@@ -253,7 +116,7 @@ capabilities:
     cap1:
         value: {get_input: value}
 """
-        bp2_yaml = """
+SCALED_SOURCE_BLUEPRINT = """
 tosca_definitions_version: cloudify_dsl_1_4
 imports:
     - cloudify/types/types.yaml
@@ -319,24 +182,229 @@ policies:
     properties:
       default_instances: 2
 """
+
+
+def _node_capability(prop):
+    """IDD creator of a get_capability in a compute_node property"""
+    return f'{NODES}.{COMPUTE_NODE}.{PROPERTIES}.{prop}.get_capability'
+
+
+def _output_capability(output):
+    """IDD creator of a get_capability in an output's value"""
+    return f'{OUTPUTS}.{output}.value.get_capability'
+
+
+# get_capability IDD creators in the deployment update tests: those in both
+# the base and the modified blueprint, and those only in one of them
+_CHANGED_CAPABILITIES = [
+    'static_changed_to_static',
+    'static_changed_to_function',
+    'function_changed_to_function',
+    'function_changed_to_static',
+]
+UPDATE_CAPABILITY_CREATORS = tuple(
+    [_node_capability(name) for name in _CHANGED_CAPABILITIES] +
+    [_output_capability(name) for name in _CHANGED_CAPABILITIES]
+)
+UPDATE_BASE_CAPABILITY_CREATORS = (
+    _node_capability('might_be_deleted'),
+    _output_capability('should_be_deleted'),
+)
+UPDATE_MOD_CAPABILITY_CREATORS = (
+    _output_capability('should_be_created_static'),
+    _output_capability('should_be_created_function'),
+    _node_capability('should_be_created_static'),
+    _node_capability('should_be_created_function'),
+)
+
+
+@pytest.mark.usefixtures('cloudmock_plugin')
+class TestInterDeploymentDependenciesInfrastructure(AgentlessTestCase):
+
+    def test_dependencies_are_created(self):
+        self._prepare_creation_test_resources()
+        dependencies = self._assert_dependencies_count(
+            2, MAIN_DEPLOYMENT)
+        self._assert_initial_compute_node_dependencies(dependencies)
+
+        self._install_main_deployment()
+        node_instances = self.client.node_instances.list(
+            deployment_id=MAIN_DEPLOYMENT,
+            _include=NODE_INSTANCE_FIELDS,
+        )
+        shared_resource = self._get_shared_resource_instance(node_instances)
+        components = [i for i in node_instances if 'component' in i.node_id]
+        # 6 = 3 components + 1 shared resource + 2 get_capability functions
+        dependencies = self._assert_dependencies_count(
+            6, MAIN_DEPLOYMENT)
+        dependencies = self._get_dependencies_dict(dependencies)
+
+        for component in components:
+            target_deployment = \
+                component.runtime_properties['deployment']['id']
+            self._assert_dependency_exists(
+                dependency_creator=self._get_component_dependency_creator(
+                    component.id),
+                target_deployment=target_deployment,
+                dependencies=dependencies)
+        self._assert_dependency_exists(
+            dependency_creator=self._get_shared_resource_dependency_creator(
+                shared_resource.id),
+            target_deployment=SR_DEPLOYMENT,
+            dependencies=dependencies)
+
+        self._uninstall_main_deployment()
+        dependencies = self._assert_dependencies_count(
+            2, MAIN_DEPLOYMENT)
+        for dependency in dependencies:
+            self.assertNotIn(COMPONENT, dependency.dependency_creator)
+            self.assertNotIn(SHARED_RESOURCE, dependency.dependency_creator)
+
+        self.delete_deployment(MAIN_DEPLOYMENT,
+                               validate=True,
+                               client=self.client)
+        # the main deployment's own dependencies are deleted along with it,
+        # so count all of them, to find any left in other deployments
+        self._assert_dependencies_count(0)
+
+    def test_dependencies_are_updated(self):
+        self._test_dependencies_are_updated(skip_uninstall=False)
+
+    def test_dependencies_are_updated_but_keeps_old_dependencies(self):
+        self._test_dependencies_are_updated(skip_uninstall=True)
+
+    def test_cyclic_dependency_after_execution(self):
+        """Creating a cyclic dependency in a workflow, fails that execution.
+
+        We'll prepare two deployments that will eventually depend on each
+        other; having dep1 depend on dep2 is OK, but then making dep2
+        depend on dep1, is going to fail the execution that attempted
+        to set this dependency.
+        """
         self.upload_blueprint_resource(
-            self.make_yaml_file(bp1_yaml),
+            'dsl/idd/dependency_from_property.yaml', 'bp1'
+        )
+        deps = [
+            self.client.deployments.create(
+                'bp1', 'dep1', inputs={'target_id': 'dep2'}),
+            self.client.deployments.create(
+                'bp1', 'dep2', inputs={'target_id': 'dep1'}),
+        ]
+        self.wait_for_executions_to_end(*(
+            dep['create_execution'] for dep in deps))
+        exc = self.client.executions.start(
+            'dep1', 'execute_operation', parameters={
+                'operation': 'custom.set_attribute',
+            }
+        )
+        self.wait_for_execution_to_end(exc)
+
+        outs = self.client.deployments.outputs.get('dep1')
+        assert outs.outputs == {'out1': 1}
+
+        exc = self.client.executions.start(
+            'dep2', 'execute_operation', parameters={
+                'operation': 'custom.set_attribute',
+            }
+        )
+        with self.assertRaises(RuntimeError):
+            self.wait_for_execution_to_end(exc)
+
+    def test_dependency_func_with_context(self):
+        """Check that IDD-creating-functions can use context
+
+        Specifically, get_capability must be able to fetch things from
+        SELF and TARGET.
+        """
+        self.upload_blueprint_from_string(
+            CONTEXT_TARGET_BLUEPRINT,
             blueprint_id='bp1',
         )
-        self.upload_blueprint_resource(
-            self.make_yaml_file(bp2_yaml),
+        self.upload_blueprint_from_string(
+            CONTEXT_SOURCE_BLUEPRINT,
             blueprint_id='bp2',
         )
+        dep1 = self.deploy(blueprint_id='bp1', deployment_id='d1')
+        dep2 = self.deploy(blueprint_id='bp2', deployment_id='d2')
+        exc = self.client.executions.create(dep2.id, 'install')
+        self.wait_for_execution_to_end(exc)
+
+        # these reads are independent, so do them all at once
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            idds = executor.submit(
+                self.client.inter_deployment_dependencies.list,
+                source_deployment_id=dep2.id,
+            )
+            nodes = executor.submit(
+                self.client.nodes.list,
+                deployment_id=dep2.id,
+                id='n1',
+                evaluate_functions=True,
+            )
+            nis = executor.submit(
+                self.client.node_instances.list,
+                deployment_id=dep2.id,
+                node_id='n1',
+            )
+        idds, nodes, nis = idds.result(), nodes.result(), nis.result()
+        for idd in idds:
+            # we have declared IDDs using several ways, but they all point
+            # to dep1 in the end
+            assert idd.target_deployment_id == dep1.id
+            # ...they all come from a function...
+            assert idd.target_deployment_func.get('function')
+            # ...and they all declare some context
+            assert idd.target_deployment_func.get('context')
+
+        assert len(nodes) == 1
+        assert nodes[0].properties['x'] == 'capability value'
+        assert len(nis) == 1
+        assert nis[0].runtime_properties['lifecycle_operation'] == \
+            'capability value'
+        assert nis[0].runtime_properties['rel_operation'] == \
+            'capability value'
+
+    def test_idd_with_context_multiple_instances(self):
+        """Check that IDDs can come from functions in scaled instances.
+
+        A somewhat complex blueprint!
+        First, the node `rel_target` (two instances of it) each fetch a
+        different entry from the input list, and store it in their runtime
+        properties.
+        Then, two instances of node `n1` run a lifecycle operation, and a
+        relationship operation, fetching a capability from a deployment given
+        by their related `rel_target` instance, with the capability name
+        based on their own property.
+        Finally, we check that since we've had two instances of the scaling
+        group, we've seen capability values coming from BOTH related
+        deployments.
+        """
+        self.upload_blueprint_from_string(
+            SCALED_TARGET_BLUEPRINT,
+            blueprint_id='bp1',
+        )
+        self.upload_blueprint_from_string(
+            SCALED_SOURCE_BLUEPRINT,
+            blueprint_id='bp2',
+        )
+        # d1 and d2 are independent, so let their environments be created
+        # at the same time
         dep1 = self.deploy(
             blueprint_id='bp1',
             deployment_id='d1',
             inputs={'value': 'value1'},
+            wait=False,
         )
         dep2 = self.deploy(
             blueprint_id='bp1',
             deployment_id='d2',
             inputs={'value': 'value2'},
+            wait=False,
         )
+        self.wait_for_executions_to_end(*(
+            dep['create_execution']
+            for dep in [dep1, dep2]
+        ))
         dep3 = self.deploy(
             blueprint_id='bp2',
             deployment_id='d3',
@@ -348,25 +416,31 @@ policies:
         exc = self.client.executions.create(dep3.id, 'install')
         self.wait_for_execution_to_end(exc)
 
-        idds = self.client.inter_deployment_dependencies.list(
-            source_deployment_id=dep3.id)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            idds = executor.submit(
+                self.client.inter_deployment_dependencies.list,
+                source_deployment_id=dep3.id,
+            )
+            nis = executor.submit(
+                self.client.node_instances.list,
+                deployment_id=dep3.id,
+                node_id='n1',
+            )
+        idds, nis = idds.result(), nis.result()
         assert {idd.target_deployment_id for idd in idds} == {dep1.id, dep2.id}
-        nis = self.client.node_instances.list(
-            deployment_id=dep3.id,
-            node_id='n1',
-        )
-        assert {ni.runtime_properties['lifecycle_operation'] for ni in nis} ==\
-            {'value1', 'value2'}
-        assert {ni.runtime_properties['rel_operation'] for ni in nis} ==\
-            {'value1', 'value2'}
+        lifecycle_values, rel_values = set(), set()
+        for ni in nis:
+            lifecycle_values.add(ni.runtime_properties['lifecycle_operation'])
+            rel_values.add(ni.runtime_properties['rel_operation'])
+        assert lifecycle_values == {'value1', 'value2'}
+        assert rel_values == {'value1', 'value2'}
 
     def _test_dependencies_are_updated(self, skip_uninstall):
-        self._assert_dependencies_count(0)
         self._prepare_dep_update_test_resources()
         base_expected_dependencies = self._get_dep_update_test_dependencies(
             is_first_state=True)
         base_dependencies = self._assert_dependencies_count(
-            len(base_expected_dependencies))
+            len(base_expected_dependencies), MAIN_DEPLOYMENT)
 
         self._assert_dependencies_exist(base_expected_dependencies,
                                         base_dependencies)
@@ -375,39 +449,44 @@ policies:
         mod_expected_dependencies = self._get_dep_update_test_dependencies(
             is_first_state=False)
         mod_dependencies = self._assert_dependencies_count(
-            len(mod_expected_dependencies))
+            len(mod_expected_dependencies), MAIN_DEPLOYMENT)
         self._assert_dependencies_exist(mod_expected_dependencies,
                                         mod_dependencies)
 
         self.undeploy_application(MAIN_DEPLOYMENT, is_delete_deployment=True)
+        # not scoped to the main deployment: see test_dependencies_are_created
         self._assert_dependencies_count(0)
 
     def _uninstall_main_deployment(self):
         self.execute_workflow('uninstall', MAIN_DEPLOYMENT)
 
     def _perform_update_on_main_deployment(self, skip_uninstall=False):
-        execution_id = \
-            self.client.deployment_updates.update_with_existing_blueprint(
-                deployment_id=MAIN_DEPLOYMENT,
-                blueprint_id=MOD_BLUEPRINT_ID,
-                skip_uninstall=skip_uninstall
-            ).execution_id
-        execution = self.client.executions.get(execution_id)
-        self.wait_for_execution_to_end(execution)
+        update = self.client.deployment_updates.update_with_existing_blueprint(
+            deployment_id=MAIN_DEPLOYMENT,
+            blueprint_id=MOD_BLUEPRINT_ID,
+            skip_uninstall=skip_uninstall
+        )
+        self.wait_for_execution_to_end(update.execution_id)
 
     def _install_main_deployment(self):
         self.execute_workflow('install', MAIN_DEPLOYMENT)
 
     @staticmethod
     def _get_component_dependency_creator(component_instance_id):
-        return '{0}.{1}'.format(COMPONENT, component_instance_id)
+        return f'{COMPONENT}.{component_instance_id}'
 
     @staticmethod
     def _get_shared_resource_dependency_creator(shared_resource_instance_id):
-        return '{0}.{1}'.format(SHARED_RESOURCE, shared_resource_instance_id)
-
-    def _assert_dependencies_count(self, amount):
-        dependencies = self.client.inter_deployment_dependencies.list()
+        return f'{SHARED_RESOURCE}.{shared_resource_instance_id}'
+
+    def _assert_dependencies_count(self, amount, source_deployment_id=None):
+        filters = {}
+        if source_deployment_id is not None:
+            filters['source_deployment_id'] = source_deployment_id
+        dependencies = self.client.inter_deployment_dependencies.list(
+            _include=IDD_FIELDS,
+            **filters
+        )
         self.assertEqual(amount, len(dependencies))
         return dependencies
 
@@ -424,16 +503,23 @@ policies:
                                        client=self.client)
 
     def _prepare_dep_update_test_resources(self):
-        self.client.secrets.create(SR_DEPLOYMENT1 + '_key',
-                                   SR_DEPLOYMENT1)
-        self.client.secrets.create(SR_DEPLOYMENT2 + '_key',
-                                   SR_DEPLOYMENT2)
-        self._deploy_shared_resource(SR_DEPLOYMENT1)
-
-        self._deploy_shared_resource(
+        self._create_secrets({
+            SR_DEPLOYMENT1 + '_key': SR_DEPLOYMENT1,
+            SR_DEPLOYMENT2 + '_key': SR_DEPLOYMENT2,
+        })
+        # both shared resources use the same blueprint, but otherwise they're
+        # independent, so their environments can be created at the same time
+        sr_deployment1 = self._deploy_shared_resource(SR_DEPLOYMENT1,
+                                                      wait=False)
+        sr_deployment2 = self._deploy_shared_resource(
             SR_DEPLOYMENT2,
             upload_blueprint=False,
-            resource_visibility=VisibilityState.PRIVATE)
+            resource_visibility=VisibilityState.PRIVATE,
+            wait=False)
+        self.wait_for_executions_to_end(*(
+            dep['create_execution']
+            for dep in [sr_deployment1, sr_deployment2]
+        ))
 
         self._upload_component_blueprint()
         self.upload_blueprint_resource(BLUEPRINT_MOD,
@@ -442,21 +528,34 @@ policies:
         self._deploy_main_deployment(BLUEPRINT_BASE)
         self._install_main_deployment()
 
+    def _create_secrets(self, secrets):
+        """Create all the secrets (a key: value dict), concurrently"""
+        with ThreadPoolExecutor(max_workers=len(secrets)) as executor:
+            creates = [
+                executor.submit(self.client.secrets.create, key, value)
+                for key, value in secrets.items()
+            ]
+            for create in creates:
+                create.result()
+
     def _deploy_main_deployment(self, blueprint_path):
         main_blueprint = get_resource(blueprint_path)
-        self.deploy(main_blueprint, MAIN_BLUEPRINT_ID, 'main_deployment')
+        self.deploy(main_blueprint, MAIN_BLUEPRINT_ID, MAIN_DEPLOYMENT)
 
     def _deploy_shared_resource(self,
                                 deployment_id=SR_DEPLOYMENT,
                                 upload_blueprint=True,
-                                resource_visibility=VisibilityState.GLOBAL):
+                                resource_visibility=VisibilityState.GLOBAL,
+                                wait=True):
         shared_resource_blueprint = get_resource(
             'dsl/blueprint_with_capabilities.yaml')
-        self.deploy(shared_resource_blueprint if upload_blueprint else None,
-                    'shared_resource_blueprint',
-                    deployment_id,
-                    blueprint_visibility=resource_visibility,
-                    deployment_visibility=resource_visibility)
+        return self.deploy(
+            shared_resource_blueprint if upload_blueprint else None,
+            'shared_resource_blueprint',
+            deployment_id,
+            wait=wait,
+            blueprint_visibility=resource_visibility,
+            deployment_visibility=resource_visibility)
 
     def _assert_dependency_exists(self,
                                   dependency_creator,
@@ -512,78 +611,37 @@ policies:
         if not is_first_state:
             shared_deployment_target = SR_DEPLOYMENT2
             comp_target_id = COMP_DEPLOYMENT2
-        node_instances = self.client.node_instances.list()
+        node_instances = self.client.node_instances.list(
+            deployment_id=MAIN_DEPLOYMENT,
+            node_id=['shared_resource_node', 'single_component_node'],
+            _include=NODE_INSTANCE_FIELDS,
+        )
         shared_resource = self._get_shared_resource_instance(
             node_instances)
         component = self._get_component_instance(node_instances)
-        dependencies = {
-            '{0}.{1}.{2}.static_changed_to_static.get_capability'
-            ''.format(NODES, COMPUTE_NODE, PROPERTIES):
-                shared_deployment_target,
-            '{0}.{1}.{2}.static_changed_to_function.get_capability'
-            ''.format(NODES, COMPUTE_NODE, PROPERTIES):
-                shared_deployment_target,
-            '{0}.{1}.{2}.function_changed_to_function.get_capability'
-            ''.format(NODES, COMPUTE_NODE, PROPERTIES):
-                shared_deployment_target,
-            '{0}.{1}.{2}.function_changed_to_static.get_capability'
-            ''.format(NODES, COMPUTE_NODE, PROPERTIES):
-                shared_deployment_target,
-            '{0}.static_changed_to_static.value.get_capability'
-            ''.format(OUTPUTS):
-                shared_deployment_target,
-            '{0}.static_changed_to_function.value.get_capability'
-            ''.format(OUTPUTS):
-                shared_deployment_target,
-            '{0}.function_changed_to_function.value.get_capability'
-            ''.format(OUTPUTS):
-                shared_deployment_target,
-            '{0}.function_changed_to_static.value.get_capability'
-            ''.format(OUTPUTS):
-                shared_deployment_target,
-            self._get_shared_resource_dependency_creator(
-                shared_resource.id):
-                shared_deployment_target,
-            self._get_component_dependency_creator(component.id):
-                comp_target_id,
-        }
-
+        dependencies = dict.fromkeys(UPDATE_CAPABILITY_CREATORS,
+                                     shared_deployment_target)
+        dependencies[self._get_shared_resource_dependency_creator(
+            shared_resource.id)] = shared_deployment_target
+        dependencies[self._get_component_dependency_creator(
+            component.id)] = comp_target_id
         if is_first_state:
-            dependencies['{0}.{1}.{2}.might_be_deleted.get_capability'
-                         ''.format(NODES, COMPUTE_NODE, PROPERTIES)] = \
-                SR_DEPLOYMENT1
-
-        if is_first_state:
-            dependencies['{0}.should_be_deleted.value.get_capability'
-                         ''.format(OUTPUTS)] = SR_DEPLOYMENT1
+            dependencies.update(dict.fromkeys(
+                UPDATE_BASE_CAPABILITY_CREATORS, SR_DEPLOYMENT1))
         else:
-
-            dependencies.update({
-                '{0}.should_be_created_static.value.get_capability'
-                ''.format(OUTPUTS):
-                    SR_DEPLOYMENT2,
-                '{0}.should_be_created_function.value.get_capability'
-                ''.format(OUTPUTS):
-                    SR_DEPLOYMENT2,
-                '{0}.{1}.{2}.should_be_created_static.get_capability'
-                ''.format(NODES, COMPUTE_NODE, PROPERTIES):
-                    SR_DEPLOYMENT2,
-                '{0}.{1}.{2}.should_be_created_function.get_capability'
-                ''.format(NODES, COMPUTE_NODE, PROPERTIES):
-                    SR_DEPLOYMENT2,
-            })
-
+            dependencies.update(dict.fromkeys(
+                UPDATE_MOD_CAPABILITY_CREATORS, SR_DEPLOYMENT2))
         return dependencies
 
     @staticmethod
     def _get_shared_resource_instance(node_instances):
-        return [i for i in node_instances
-                if 'shared_resource_node' == i.node_id][0]
+        return next(i for i in node_instances
+                    if i.node_id == 'shared_resource_node')
 
     @staticmethod
     def _get_component_instance(node_instances):
-        return [i for i in node_instances
-                if 'single_component_node' == i.node_id][0]
+        return next(i for i in node_instances
+                    if i.node_id == 'single_component_node')
 
     @staticmethod
     def _get_dependencies_dict(dependencies_list):
@@ -1,13 +1,16 @@
 import csv
+import io
 import os
 import sys
 import json
 import time
 import uuid
 import logging
+import tarfile
 import tempfile
 import unittest
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 
 import wagon
@@ -21,13 +24,13 @@ from cloudify.snapshots import STATES, SNAPSHOT_RESTORE_FLAG_FILE
 from integration_tests.framework import utils
 from integration_tests.tests import utils as test_utils
 from integration_tests.tests.utils import (
-    get_resource,
     wait_for_blueprint_upload,
     wait_for_deployment_creation_to_complete,
     wait_for_deployment_deletion_to_complete,
     verify_deployment_env_created,
     run_postgresql_command,
     do_retries,
+    get_resource_archive,
 )
 
 from cloudify_rest_client.executions import Execution
@@ -272,11 +275,18 @@ class BaseTestCase(unittest.TestCase):
             get = client.execution_groups.get
         else:
             get = client.executions.get
+        if isinstance(execution, str):
+            # only the id is known: the first poll doubles as the fetch
+            execution = get(execution)
         deadline = time.time() + timeout_seconds
+        # poll often at first, because many executions are short, but back
+        # off to every 0.5s for the long ones
+        delay = 0.1
         while execution.status not in Execution.END_STATES:
             if not is_group:
                 assert execution.ended_at is None
-            time.sleep(0.5)
+            time.sleep(delay)
+            delay = min(delay * 1.5, 0.5)
             execution = get(execution.id)
             if time.time() > deadline:
                 raise TimeoutError(
@@ -293,6 +303,21 @@ class BaseTestCase(unittest.TestCase):
                     execution.status))
         return execution
 
+    def wait_for_executions_to_end(self, *executions, **kwargs):
+        """Wait for all the executions to end, concurrently.
+
+        Takes the same keyword arguments as wait_for_execution_to_end,
+        and returns the ended executions, in order.
+        """
+        if not executions:
+            return []
+        with ThreadPoolExecutor(max_workers=len(executions)) as executor:
+            waits = [
+                executor.submit(self.wait_for_execution_to_end, exc, **kwargs)
+                for exc in executions
+            ]
+            return [wait.result() for wait in waits]
+
     def wait_for_snapshot_restore_to_end(self, client=None):
         client = client or self.client
 
@@ -401,9 +426,56 @@ class BaseTestCase(unittest.TestCase):
                                   blueprint_id,
                                   client=None):
         client = client or self.client
-        blueprint = get_resource(dsl_resource_path)
-        client.blueprints.upload(blueprint, entity_id=blueprint_id)
-        wait_for_blueprint_upload(blueprint_id, self.client, True)
+        if os.path.isabs(dsl_resource_path):
+            # not a resource, eg. a file from make_yaml_file
+            client.blueprints.upload(dsl_resource_path, entity_id=blueprint_id)
+            wait_for_blueprint_upload(blueprint_id, client, True)
+        else:
+            self.upload_blueprint_archive(
+                get_resource_archive(dsl_resource_path),
+                blueprint_id,
+                os.path.basename(dsl_resource_path),
+                client=client,
+            )
+
+    def upload_blueprint_archive(self, archive_path, blueprint_id,
+                                 blueprint_filename, client=None):
+        """Upload an already made blueprint archive, and wait for it.
+
+        client.blueprints.upload always archives the blueprint's directory
+        itself; this is for when the archive is reused, or built directly.
+        """
+        client = client or self.client
+        client.blueprints.publish_archive(
+            archive_path,
+            blueprint_id,
+            blueprint_filename=blueprint_filename,
+        )
+        wait_for_blueprint_upload(blueprint_id, client, True)
+
+    def upload_blueprint_from_string(self, content, blueprint_id,
+                                     client=None):
+        """Upload a single-file blueprint, with the given yaml content.
+
+        The blueprint archive is written directly, rather than writing
+        the yaml file, and then archiving its whole directory.
+        """
+        client = client or self.client
+        fd, archive_path = tempfile.mkstemp(
+            dir=str(self.workdir), suffix='.tar.gz')
+        os.close(fd)
+        data = content.encode('utf-8')
+        with tarfile.open(archive_path, 'w:gz') as tar:
+            blueprint_dir = tarfile.TarInfo('blueprint')
+            blueprint_dir.type = tarfile.DIRTYPE
+            blueprint_dir.mode = 0o755
+            tar.addfile(blueprint_dir)
+            blueprint_file = tarfile.TarInfo('blueprint/blueprint.yaml')
+            blueprint_file.size = len(data)
+            blueprint_file.mode = 0o644
+            tar.addfile(blueprint_file, io.BytesIO(data))
+        self.upload_blueprint_archive(
+            archive_path, blueprint_id, 'blueprint.yaml', client=client)
 
     def wait_for_deployment_environment(self, deployment_id):
         do_retries(
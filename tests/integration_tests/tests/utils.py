@@ -16,17 +16,19 @@
 import os
 import json
 import time
+import atexit
 import wagon
 import shutil
 import tarfile
 import tempfile
 
 from os import path
-from functools import wraps
+from functools import lru_cache, wraps
 from datetime import datetime, timedelta
 
 from cloudify.utils import setup_logger
 from cloudify.models_states import BlueprintUploadState
+from cloudify_rest_client import utils as rest_client_utils
 from cloudify_rest_client.executions import Execution
 from integration_tests.framework import utils
 
@@ -179,6 +181,21 @@ def get_resource(resource):
     return resource_path
 
 
+@lru_cache(maxsize=None)
+def get_resource_archive(resource):
+    """
+    Gets a blueprint archive for the provided resource, made once per process.
+
+    The archive is made the same way client.blueprints.upload makes it: out
+    of the blueprint's whole directory. Most resource blueprints share one
+    large directory, which doesn't change during a test run.
+    :param resource: blueprint name relative to /resources.
+    """
+    archive_dir = tempfile.mkdtemp(prefix='blueprint-archive-')
+    atexit.register(shutil.rmtree, archive_dir, True)
+    return rest_client_utils.tar_blueprint(get_resource(resource), archive_dir)
+
+
 def do_retries(func,
                *args,
                timeout_seconds=10,
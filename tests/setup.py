@@ -29,6 +29,7 @@ setup(
         'fasteners',
         'pytest',
         'pytest-asyncio',
+        'pytest-xdist',
         'python-dateutil',
         'requests',
         'retrying',